@@ -0,0 +1,21 @@
+# Calibración del guante
+# Aprende reposo y nivel de presión de cada sensor analógico y lo guarda en
+# calibration.json para que glove.py ajuste los umbrales por canal.
+import time
+import glove
+
+print("=== CALIBRACIÓN DEL GUANTE ===")
+print("Deja la mano relajada, sin presionar...")
+time.sleep(2)
+glove.calibrate_baseline(1000)
+
+for i in range(glove.N_ANALOG):
+    print(f"Presiona y mantén el sensor de '{glove.FINGERS[i]}'...")
+    time.sleep(1.5)
+    glove.calibrate_press(i, 2000)
+    print("Suelta.")
+    time.sleep(1)
+
+glove.save_calibration()
+glove.print_calibration()
+print(f"Guardado en {glove.CALIBRATION_FILE}")
@@ -0,0 +1,335 @@
+# Haptic Glove - Driver de hardware compartido
+# Tabla única de pines/umbrales y rutinas de sensores y actuadores.
+# Las rutinas calientes se toman de glove_native.py (@micropython.native /
+# @micropython.viper); si el puerto no tiene emisor nativo se usa la versión
+# en Python puro definida aquí.
+import time, ujson
+from array import array
+from machine import ADC, Pin, PWM
+
+# ================================
+# Configuración de hardware
+# ================================
+
+# Orden de canales = orden de publicación (pinky -> thumb)
+#  dedo       tipo       pin  on     off   LED (r, g, b)   motor
+HW_CONFIG = (
+    ("pinky",  "analog",  28, 20000, 1000, (1, 2, 3),    19),
+    ("ring",   "analog",  27, 20000, 1000, (4, 5, 6),    20),
+    ("middle", "analog",  26, 20000, 1000, (7, 8, 9),    17),
+    ("index",  "digital", 22, None,  None, (10, 11, 12), 16),
+    ("thumb",  "digital", 21, None,  None, (13, 14, 15), 18),
+)
+
+FINGERS = [row[0] for row in HW_CONFIG]
+N_CHANNELS = len(HW_CONFIG)
+
+MOTOR_FREQ = 1000
+DEBOUNCE_MS = 20
+
+# ----------- Objetos de hardware -----------
+# Los analógicos van primero en HW_CONFIG: índices 0..N_ANALOG-1
+analog = [ADC(Pin(row[2])) for row in HW_CONFIG if row[1] == "analog"]
+digital = [Pin(row[2], Pin.IN, Pin.PULL_DOWN) for row in HW_CONFIG if row[1] == "digital"]
+sensors = analog + digital
+N_ANALOG = len(analog)
+
+leds = [[Pin(p, Pin.OUT) for p in row[5]] for row in HW_CONFIG]
+motors = [PWM(Pin(row[6])) for row in HW_CONFIG]
+
+# ----------- Filtros de entrada (preasignados) -----------
+# Sobremuestreo -> mediana de 3 (ring buffer por canal) -> EMA -> histeresis
+# por canal con umbrales calibrados. Digitales con debounce.
+OVERSAMPLE = 4      # lecturas promediadas por canal en cada vuelta
+MEDIAN_N = 3        # ventana de la mediana (fija: el kernel es mediana de 3)
+EMA_SHIFT = 2       # EMA con alfa = 1/2**EMA_SHIFT por cada ms transcurrido
+EMA_MAX_STEPS = 16  # con >= 16 ms entre lecturas la EMA toma la mediana directa
+MEDIAN_STALE_MS = 5 # ventana más vieja que esto se rellena con 3 lecturas nuevas
+# (los tres valores se repiten como const() en glove_native.py)
+#
+# Límite: el suavizado temporal (mediana entre vueltas + EMA) solo existe con
+# lazos de pocos ms. Con lazos más lentos (pruebaSistema.py va a 50 ms, o un
+# lazo frenado por la red) una lectura vieja ya no es "ruido" sino retraso, así
+# que cada vuelta toma 3 promedios seguidos de OVERSAMPLE lecturas y usa su
+# mediana: sigue descartando un pico aislado, y la histeresis hace el resto.
+
+raw = array('H', [0] * N_ANALOG)                   # último promedio crudo
+ring = array('H', [0] * (N_ANALOG * MEDIAN_N))     # ventana de mediana por canal
+filter_ctl = array('i', [0, 0])                    # [posición en ring, ticks_ms última lectura]
+filt = array('H', [0] * N_ANALOG)                  # salida filtrada (EMA)
+# Umbrales intercalados [on0, off0, on1, off1, ...] (viper admite 4 args)
+thresh = array('H', [0] * (2 * N_ANALOG))
+state = bytearray(N_CHANNELS)                      # estado filtrado 0/1 por canal
+last_change_ms = array('i', [0] * (N_CHANNELS - N_ANALOG))
+
+# ----------- Calibración -----------
+# Umbrales = reposo + fracción del rango reposo->presión, con margen sobre el ruido
+CALIBRATION_FILE = "calibration.json"
+ON_PCT, OFF_PCT = 50, 20    # % del rango para encender / apagar
+NOISE_MARGIN = 4            # apagado al menos NOISE_MARGIN * ruido sobre el reposo
+MIN_GAP = 500               # separación mínima entre on y off
+BASELINE_SHIFT = 3          # velocidad de seguimiento del reposo (1/8 por llamada)
+
+baseline = array('H', [0] * N_ANALOG)
+noise = array('H', [0] * N_ANALOG)
+# Sin calibrar: umbrales de HW_CONFIG; la presión por defecto los reproduce
+press = array('H', [min(65535, row[3] * 100 // ON_PCT) for row in HW_CONFIG if row[1] == "analog"])
+for _i, _row in enumerate(HW_CONFIG[:N_ANALOG]):
+    thresh[2 * _i] = _row[3]
+    thresh[2 * _i + 1] = _row[4]
+
+
+# ================================
+# Implementación en Python puro
+# ================================
+
+def _filter_py(ring, filt, n, steps):
+    """Mediana de 3 de cada ventana y `steps` pasos de EMA (uno por ms) sobre `filt`."""
+    for i in range(n):
+        a = ring[3 * i]
+        b = ring[3 * i + 1]
+        c = ring[3 * i + 2]
+        if a > b:
+            a, b = b, a
+        if b > c:
+            b = c
+        if a > b:
+            b = a
+        if steps >= EMA_MAX_STEPS:
+            filt[i] = b
+            continue
+        f = filt[i]
+        for _ in range(steps):
+            f += (b - f) >> EMA_SHIFT
+        filt[i] = f
+
+def _hysteresis_py(filt, thresh, state, n):
+    """Histeresis por canal con umbrales intercalados on/off."""
+    for i in range(n):
+        if state[i]:
+            state[i] = 1 if filt[i] > thresh[2 * i + 1] else 0
+        else:
+            state[i] = 1 if filt[i] > thresh[2 * i] else 0
+
+def _read_sensors_py(analog, digital, raw, ring, filter_ctl, filt, thresh, state,
+                     last_change_ms, oversample, debounce_ms):
+    """Lee los canales filtrados con histeresis y debounce sobre `state` (sin asignar memoria).
+
+    El filtro avanza según los ms transcurridos desde la lectura anterior, así
+    responde igual con un lazo de 1 ms que con uno de cientos de ms.
+    """
+    n = len(analog)
+    now = time.ticks_ms()
+    dt = time.ticks_diff(now, filter_ctl[1])
+    filter_ctl[1] = now
+    stale = dt > MEDIAN_STALE_MS
+    pos = filter_ctl[0]
+    for i in range(n):
+        adc = analog[i]
+        # Ventana vieja: se rellena entera con lecturas nuevas, no con una copia
+        for k in range(MEDIAN_N if stale else 1):
+            acc = 0
+            for _ in range(oversample):
+                acc += adc.read_u16()
+            v = acc // oversample
+            ring[3 * i + (k if stale else pos)] = v
+        raw[i] = v
+    filter_ctl[0] = 0 if pos == 2 else pos + 1
+    _filter_py(ring, filt, n, min(dt, EMA_MAX_STEPS))
+    _hysteresis_py(filt, thresh, state, n)
+
+    for j in range(len(digital)):
+        val = digital[j].value()
+        if val != state[n + j] and time.ticks_diff(now, last_change_ms[j]) >= debounce_ms:
+            state[n + j] = val
+            last_change_ms[j] = now
+    return state
+
+def _apply_py(led, motor, r, g, b, duty):
+    """Escribe color (0/1 por canal) y duty del motor de un dedo."""
+    led[0].value(r)
+    led[1].value(g)
+    led[2].value(b)
+    motor.duty_u16(duty)
+
+
+try:
+    import glove_native
+    _read_sensors = glove_native.read_sensors
+    _apply = glove_native.apply
+    NATIVE = True
+except Exception:
+    # Puerto sin emisor nativo/viper o error al compilar (p. ej. ViperTypeError)
+    _read_sensors = _read_sensors_py
+    _apply = _apply_py
+    NATIVE = False
+
+
+# ================================
+# API del driver
+# ================================
+
+def read_sensors():
+    """Lectura filtrada de los 5 canales. Devuelve el bytearray compartido `state`."""
+    return _read_sensors(analog, digital, raw, ring, filter_ctl, filt, thresh, state,
+                         last_change_ms, OVERSAMPLE, DEBOUNCE_MS)
+
+# ================================
+# Calibración
+# ================================
+
+def update_thresholds():
+    """Recalcula on/off de cada canal a partir de reposo, ruido y presión."""
+    for i in range(N_ANALOG):
+        base = baseline[i]
+        span = max(press[i] - base, 0)
+        off = max(base + span * OFF_PCT // 100, base + noise[i] * NOISE_MARGIN)
+        on = max(base + span * ON_PCT // 100, off + MIN_GAP)
+        thresh[2 * i] = min(on, 65535)
+        thresh[2 * i + 1] = min(off, 65535)
+
+def prime_filters():
+    """Llena ventanas y EMA con una lectura para arrancar sin transitorio."""
+    for i in range(N_ANALOG):
+        v = analog[i].read_u16()
+        raw[i] = v
+        filt[i] = v
+        for k in range(MEDIAN_N):
+            ring[MEDIAN_N * i + k] = v
+    filter_ctl[1] = time.ticks_ms()
+
+def _sample_filtered(duration_ms, lo, hi, acc):
+    """Corre el filtro duration_ms acumulando mínimo, máximo y suma por canal."""
+    count = 0
+    start = time.ticks_ms()
+    while time.ticks_diff(time.ticks_ms(), start) < duration_ms:
+        read_sensors()
+        for i in range(N_ANALOG):
+            v = filt[i]
+            lo[i] = min(lo[i], v)
+            hi[i] = max(hi[i], v)
+            acc[i] += v
+        count += 1
+        time.sleep_ms(1)
+    return max(count, 1)
+
+def calibrate_baseline(duration_ms=300):
+    """Aprende reposo y ruido de cada canal analógico (mano sin presionar)."""
+    prime_filters()
+    lo = [65535] * N_ANALOG
+    hi = [0] * N_ANALOG
+    acc = [0] * N_ANALOG
+    count = _sample_filtered(duration_ms, lo, hi, acc)
+    for i in range(N_ANALOG):
+        baseline[i] = acc[i] // count
+        noise[i] = hi[i] - lo[i]
+    update_thresholds()
+
+def calibrate_press(i, duration_ms=2000):
+    """Aprende el nivel de presión del canal i (mantener presionado)."""
+    lo = [65535] * N_ANALOG
+    hi = [0] * N_ANALOG
+    acc = [0] * N_ANALOG
+    _sample_filtered(duration_ms, lo, hi, acc)
+    press[i] = hi[i]
+    update_thresholds()
+
+def track_baseline():
+    """Recalibración periódica: acerca el reposo al filtrado de canales sueltos."""
+    for i in range(N_ANALOG):
+        if not state[i] and filt[i] < thresh[2 * i + 1]:
+            b = baseline[i]
+            baseline[i] = b + ((filt[i] - b) >> BASELINE_SHIFT)
+    update_thresholds()
+
+def save_calibration():
+    """Guarda reposo, ruido y presión en CALIBRATION_FILE."""
+    try:
+        with open(CALIBRATION_FILE, "w") as f:
+            ujson.dump({"baseline": list(baseline), "noise": list(noise),
+                        "press": list(press)}, f)
+    except OSError as e:
+        print(f"[CALIB] No se pudo guardar calibración: {e}")
+
+def load_calibration():
+    """Carga CALIBRATION_FILE si existe. Devuelve True si se aplicó."""
+    try:
+        with open(CALIBRATION_FILE) as f:
+            data = ujson.load(f)
+    except (OSError, ValueError):
+        return False
+    for i in range(N_ANALOG):
+        baseline[i] = data["baseline"][i]
+        noise[i] = data["noise"][i]
+        press[i] = data["press"][i]
+    update_thresholds()
+    return True
+
+def print_calibration():
+    """Imprime reposo, ruido, presión y umbrales por canal."""
+    print("=== CALIBRACIÓN ===")
+    for i in range(N_ANALOG):
+        print(f"{FINGERS[i]:<7} reposo={baseline[i]:>5} ruido={noise[i]:>5} "
+              f"presión={press[i]:>5} on={thresh[2 * i]:>5} off={thresh[2 * i + 1]:>5}")
+    print("===================")
+
+# ================================
+# Actuadores
+# ================================
+
+def init_motors():
+    """Configura frecuencia PWM para todos los motores."""
+    for motor in motors:
+        motor.freq(MOTOR_FREQ)
+
+def set_actuator(i, r, g, b, duty):
+    """Enciende LED y motor del canal i."""
+    _apply(leds[i], motors[i], r, g, b, duty)
+
+def turn_off_actuator(i):
+    """Apaga LED y motor del canal i."""
+    _apply(leds[i], motors[i], 0, 0, 0, 0)
+
+def all_actuators_off():
+    """Apaga todos los LEDs y motores"""
+    for i in range(N_CHANNELS):
+        _apply(leds[i], motors[i], 0, 0, 0, 0)
+
+def set_led_color(led, r, g, b):
+    """Enciende un LED en el color indicado."""
+    led[0].value(1 if r else 0)
+    led[1].value(1 if g else 0)
+    led[2].value(1 if b else 0)
+
+def turn_off_led(led):
+    """Apaga LED"""
+    set_led_color(led, 0, 0, 0)
+
+#Código de legado
+def hex_to_rgb565(hex_color):
+    """Convierte un color hexadecimal #RRGGBB a tupla (r,g,b) en rango 0-65535."""
+    hex_color = hex_color.lstrip('#')
+    r = int(hex_color[0:2], 16) * 257
+    g = int(hex_color[2:4], 16) * 257
+    b = int(hex_color[4:6], 16) * 257
+    return (r, g, b)
+
+def hex_to_bin_rgb(hex_color):
+    """Convierte un color hexadecimal #RRGGBB a tupla binaria (r,g,b) 0/1"""
+    hex_color = hex_color.lstrip('#')
+    r = 1 if int(hex_color[0:2], 16) > 127 else 0
+    g = 1 if int(hex_color[2:4], 16) > 127 else 0
+    b = 1 if int(hex_color[4:6], 16) > 127 else 0
+    return (r, g, b)
+
+def finger_to_led_index(finger):
+    """Mapea nombre de dedo a índice de LED/motor."""
+    try:
+        return FINGERS.index(finger)
+    except ValueError:
+        return None
+
+
+if not load_calibration():
+    print(f"[CALIB] Sin {CALIBRATION_FILE}: umbrales por defecto de HW_CONFIG. "
+          "Correr calibrar.py con el guante puesto.")
@@ -0,0 +1,89 @@
+# Haptic Glove - Rutinas calientes compiladas a código máquina
+# Misma lógica que _read_sensors_py/_apply_py en glove.py. Se importa aparte
+# para que un puerto sin emisor nativo falle aquí y glove.py use el fallback.
+import micropython
+import time
+from micropython import const
+
+
+# Iguales a glove.EMA_SHIFT, glove.EMA_MAX_STEPS y glove.MEDIAN_STALE_MS
+_EMA_SHIFT = const(2)
+_EMA_MAX_STEPS = const(16)
+_MEDIAN_STALE_MS = const(5)
+
+
+@micropython.viper
+def _filter(ring: ptr16, filt: ptr16, n: int, steps: int):
+    """Mediana de 3 de cada ventana y `steps` pasos de EMA (uno por ms) sobre `filt`."""
+    for i in range(n):
+        a = int(ring[3 * i])
+        b = int(ring[3 * i + 1])
+        c = int(ring[3 * i + 2])
+        if a > b:
+            t = a
+            a = b
+            b = t
+        if b > c:
+            b = c
+        if a > b:
+            b = a
+        if steps >= _EMA_MAX_STEPS:
+            filt[i] = b
+            continue
+        f = int(filt[i])
+        for _ in range(steps):
+            f += (b - f) >> _EMA_SHIFT
+        filt[i] = f
+
+@micropython.viper
+def _hysteresis(filt: ptr16, thresh: ptr16, state: ptr8, n: int):
+    """Histeresis por canal con umbrales intercalados on/off."""
+    for i in range(n):
+        if state[i]:
+            if filt[i] > thresh[2 * i + 1]:
+                state[i] = 1
+            else:
+                state[i] = 0
+        else:
+            if filt[i] > thresh[2 * i]:
+                state[i] = 1
+            else:
+                state[i] = 0
+
+@micropython.native
+def read_sensors(analog, digital, raw, ring, filter_ctl, filt, thresh, state,
+                 last_change_ms, oversample, debounce_ms):
+    """Lee los canales filtrados con histeresis y debounce sobre `state` (sin asignar memoria)."""
+    n = len(analog)
+    now = time.ticks_ms()
+    dt = time.ticks_diff(now, filter_ctl[1])
+    filter_ctl[1] = now
+    stale = dt > _MEDIAN_STALE_MS
+    pos = filter_ctl[0]
+    for i in range(n):
+        adc = analog[i]
+        for k in range(3 if stale else 1):
+            acc = 0
+            for _ in range(oversample):
+                acc += adc.read_u16()
+            v = acc // oversample
+            ring[3 * i + (k if stale else pos)] = v
+        raw[i] = v
+    filter_ctl[0] = 0 if pos == 2 else pos + 1
+    _filter(ring, filt, n, dt if dt < _EMA_MAX_STEPS else _EMA_MAX_STEPS)
+    _hysteresis(filt, thresh, state, n)
+
+    for j in range(len(digital)):
+        val = digital[j].value()
+        if val != state[n + j] and time.ticks_diff(now, last_change_ms[j]) >= debounce_ms:
+            state[n + j] = val
+            last_change_ms[j] = now
+    return state
+
+@micropython.native
+def apply(led, motor, r, g, b, duty):
+    """Escribe color (0/1 por canal) y duty del motor de un dedo."""
+    led[0].value(r)
+    led[1].value(g)
+    led[2].value(b)
+    motor.duty_u16(duty)
@@ -2,8 +2,8 @@ import gc
 import ujson
 import time
 import network
-from machine import ADC, Pin, PWM
-from umqtt.simple import MQTTClient
+import glove
+from mqtt_manager import MQTTManager
 
 gc.collect()
 
@@ -18,93 +18,14 @@ MQTT_PASS = 'PapaPitufo420'
 TOPIC_ESTADO = 'picow/fingers'
 TOPIC_FEEDBACK = 'web/pressed'
 
-# === Pines de sensores analógicos y digitales ===
-FSR_PINS = {
-    "LED1": ADC(Pin(28)),
-    "LED2": ADC(Pin(27)),
-    "LED3": ADC(Pin(26)),
-}
-FSR_DIGITAL_1 = Pin(22, Pin.IN, Pin.PULL_DOWN)
-FSR_DIGITAL_2 = Pin(21, Pin.IN, Pin.PULL_DOWN)
-
-# === LEDs RGB ===
-leds = {
-    "LED1": [PWM(Pin(1)),  PWM(Pin(2)),  PWM(Pin(3))],
-    "LED2": [PWM(Pin(4)),  PWM(Pin(5)),  PWM(Pin(6))],
-    "LED3": [PWM(Pin(7)),  PWM(Pin(8)),  PWM(Pin(9))],
-    "LED4": [PWM(Pin(10)), PWM(Pin(11)), PWM(Pin(12))],
-    "LED5": [PWM(Pin(13)), PWM(Pin(14)), PWM(Pin(15))]
-}
-
-# === Motores ===
-motores = {
-    "LED1": PWM(Pin(19)),
-    "LED2": PWM(Pin(20)),
-    "LED3": PWM(Pin(17)),
-    "LED4": PWM(Pin(16)),
-    "LED5": PWM(Pin(18))
-}
-
-# === Configurar PWM ===
-for led in leds.values():
-    for pwm in led:
-        pwm.freq(1000)
-for motor in motores.values():
-    motor.freq(1000)
-
-# === Mapeo de sensores ===
-sensor = {
-    "LED1": lambda: FSR_PINS["LED1"].read_u16() >= 18000,
-    "LED2": lambda: FSR_PINS["LED2"].read_u16() >= 18000,
-    "LED3": lambda: FSR_PINS["LED3"].read_u16() >= 18000,
-    "LED4": lambda: FSR_DIGITAL_1.value() == 1,
-    "LED5": lambda: FSR_DIGITAL_2.value() == 1,
-}
+# === Hardware (pines, umbrales y filtros en glove.HW_CONFIG) ===
+glove.init_motors()
+glove.calibrate_baseline()
 
 # === Utilidades ===
-def set_led_color(led, r, g, b):
-    led[0].duty_u16(r)
-    led[1].duty_u16(g)
-    led[2].duty_u16(b)
-
-def turn_off_led(led):
-    set_led_color(led, 0, 0, 0)
-
-def hex_to_rgb565(hex_color):
-    hex_color = hex_color.lstrip('#')
-    r = int(hex_color[0:2], 16) * 257
-    g = int(hex_color[2:4], 16) * 257
-    b = int(hex_color[4:6], 16) * 257
-    return (r, g, b)
-
-def get_dedo(led_name):
-    return {
-        "LED5": "thumb",
-        "LED4": "index",
-        "LED3": "middle",
-        "LED2": "ring",
-        "LED1": "pinky"
-    }[led_name]
-
-def dedo_a_led(finger):
-    return {
-        "thumb": "LED5",
-        "index": "LED4",
-        "middle": "LED3",
-        "ring": "LED2",
-        "pinky": "LED1"
-    }.get(finger, None)
-
-def get_estado_presionado():
-    estado = {}
-    for led_name in leds:
-        estado[get_dedo(led_name)] = sensor[led_name]()
-    return estado
-
-def publicar_estado(client):
-    estado = get_estado_presionado()
-    payload = ujson.dumps(estado)
-    client.publish(TOPIC_ESTADO, payload)
+def publicar_estado(mqtt, pressed):
+    # Sin enlace, los cambios de estado quedan en el buffer del gestor
+    mqtt.publish_state(pressed, time.ticks_ms())
 
 # === CORREGIDO: Callback al recibir mensaje MQTT ===
 def on_mqtt_message(topic, msg):
@@ -119,15 +40,13 @@ def on_mqtt_message(topic, msg):
             if not isinstance(freq, int):
                 freq = 0
 
-            led_name = dedo_a_led(finger)
-            if led_name and led_name in leds:
-                r, g, b = hex_to_rgb565(color)
+            led_index = glove.finger_to_led_index(finger)
+            if led_index is not None:
+                r, g, b = glove.hex_to_bin_rgb(color)
                 if pressed:
-                    set_led_color(leds[led_name], r, g, b)
-                    motores[led_name].duty_u16(freq)
+                    glove.set_actuator(led_index, r, g, b, freq)
                 else:
-                    turn_off_led(leds[led_name])
-                    motores[led_name].duty_u16(0)
+                    glove.turn_off_actuator(led_index)
 
     except Exception as e:
         print("Error al manejar mensaje MQTT:", e)
@@ -142,30 +61,46 @@ def connect_wifi():
         while not wlan.isconnected():
             time.sleep(1)
     print('✅ WiFi conectado:', wlan.ifconfig())
+    return wlan
 
-def connect_mqtt():
-    client = MQTTClient(
+def connect_mqtt(wlan):
+    mqtt = MQTTManager(
         client_id=b'PicoClient',
         server=SERVER_HOSTNAME,
         port=8883,
         user=MQTT_USER,
         password=MQTT_PASS,
-        keepalive=7200,
+        keepalive=60,
         ssl=True,
-        ssl_params={'server_hostname': SERVER_HOSTNAME}
+        ssl_params={'server_hostname': SERVER_HOSTNAME},
+        topic_pub=TOPIC_ESTADO,
+        topic_sub=TOPIC_FEEDBACK,
+        callback=on_mqtt_message,
+        wlan=wlan,
+        wifi_ssid=SSID,
+        wifi_password=PASSWORD
     )
-    client.set_callback(on_mqtt_message)
-    client.connect()
-    client.subscribe(TOPIC_FEEDBACK)
-    print("✅ MQTT conectado")
-    return client
+    mqtt.wait_connected(15000)
+    return mqtt
 
 # === Main loop ===
-connect_wifi()
-client = connect_mqtt()
+wlan = connect_wifi()
+mqtt = connect_mqtt(wlan)
+
+# Sensores cada ~1 ms (no se pierden toques cortos); publica al cambiar
+# o, como antes, cada PUB_MS aunque no haya cambios
+PUB_MS = 300
+last_pressed = None
+t_pub = time.ticks_ms()
 
 while True:
-    client.check_msg()
-    time.sleep(0.2)
-    publicar_estado(client)
-    time.sleep(0.1)
+    pressed = glove.read_sensors()
+    if pressed != last_pressed or time.ticks_diff(time.ticks_ms(), t_pub) >= PUB_MS:
+        publicar_estado(mqtt, pressed)
+        last_pressed = pressed[:]
+        t_pub = time.ticks_ms()
+
+    # Mensajes, pings y reconexión con backoff. El connect TCP no bloquea, pero
+    # el handshake TLS sí (hasta connect_timeout_ms por intento)
+    mqtt.service()
+    time.sleep_ms(1)
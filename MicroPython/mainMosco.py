@@ -1,62 +1,44 @@
 # Haptic Glove - Mosquitto Mqtt
 # Firmware para controlar sensores, LEDs y motores  
-import time, ujson, network
-from machine import ADC, Pin, PWM
-from umqtt.simple import MQTTClient
+import time
+BOOT_T0 = time.ticks_ms()   # primera marca del arranque, antes de cualquier import pesado
+import ujson, os
+from mqtt_manager import MQTTManager
+from wifi_ap import wifi_ap_mode, HOST_IP
+from glove import (leds, motors, read_sensors, init_motors, set_led_color,
+                   turn_off_led, set_actuator, turn_off_actuator,
+                   all_actuators_off, hex_to_bin_rgb, finger_to_led_index,
+                   calibrate_baseline, track_baseline, print_calibration,
+                   NATIVE)
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
 
 # ================================
 # Configuración del sistema
 # ================================
 
 # ----------- WiFi Access Point -----------
-AP_SSID = "HapticGlove"
-AP_PASSWORD = "12345678"
-AP_IP = "192.168.4.1"
+# SSID, clave e IPs viven en wifi_ap.py (compartido con telemetria.py)
 
  # -------- MQTT ---------------
-BROKER_IP = '192.168.4.16'  # IP de tu PC cuando se conecte al AP
+BROKER_IP = HOST_IP         # Mosquitto corre en la PC conectada al AP
 BROKER_PORT = 1883
 
 TOPIC_ESTADO   = b'picow/fingers'   # Pico -> Web 
 TOPIC_FEEDBACK = b'web/pressed'     # Web  -> Pico 
 
-# ----------- Sensores -----------
-sensors = [
-    ADC(Pin(28)),                    # Sensor 1: analógico
-    ADC(Pin(27)),                    # Sensor 2: analógico
-    ADC(Pin(26)),                    # Sensor 3: analógico
-    Pin(22, Pin.IN, Pin.PULL_DOWN),  # Sensor 4: digital
-    Pin(21, Pin.IN, Pin.PULL_DOWN)   # Sensor 5: digital
-]
-
-# ----------- LEDs RGB (PWM) -----------
-leds = [
-    [Pin(1, Pin.OUT), Pin(2, Pin.OUT), Pin(3, Pin.OUT)],      # LED 1: Pinky
-    [Pin(4, Pin.OUT), Pin(5, Pin.OUT), Pin(6, Pin.OUT)],      # LED 2: Ring
-    [Pin(7, Pin.OUT), Pin(8, Pin.OUT), Pin(9, Pin.OUT)],      # LED 3: Middle
-    [Pin(10, Pin.OUT), Pin(11, Pin.OUT), Pin(12, Pin.OUT)],   # LED 4: Index
-    [Pin(13, Pin.OUT), Pin(14, Pin.OUT), Pin(15, Pin.OUT)]    # LED 5: Thumb
-]
-
-# ----------- Motores (salida digital) -----------
-
-motors = [
-    PWM(Pin(19)),  # Motor 4: Pinky
-    PWM(Pin(20)),   # Motor 5: Ring
-    PWM(Pin(17)),  # Motor 2: Middle
-    PWM(Pin(16)),  # Motor 1: Index
-    PWM(Pin(18))  # Motor 3: Thumb
-]
-
-# ----------- Filtros de entrada -----------
-# Histeresis y Debounce: Control de sensibilidad
-
-THRESH_ON, THRESH_OFF  = 20000, 1000
-analog_state = [False]*3  # estado latched por canal analógico
-digital_state = [False]*2  # estado estable de digitales
-last_change_ms = [0]*2  # para los 2 digitales (índices 3 y 4)
-DEBOUNCE_MS = 20
+# ----------- Hardware -----------
+# Pines, umbrales y filtros viven en glove.HW_CONFIG
 
+# ----------- Arranque rápido -----------
+# FAST_BOOT: la prueba de actuadores corre en el segundo núcleo mientras se
+# levanta el AP y se conecta al broker. Si el apagado anterior fue limpio
+# (existe CLEAN_SHUTDOWN_FILE) la prueba se omite por completo.
+FAST_BOOT = True
+CLEAN_SHUTDOWN_FILE = "clean_shutdown"
 
 # ================================
 # MEDICIÓN DE LATENCIA
@@ -123,82 +105,28 @@ def print_latency_stats(reset=False):
             latency_stats["max"] = None
             latency_stats["last"] = None
 
-#===============================
-# Utilidades de lectura de sensores
-#===============================
-
-            
-def init_motors():
-    """Configura frecuencia PWM para todos los motores."""
-    for motor in motors:
-            motor.freq(1000)
-
-def set_led_color(led, r, g, b):
-    """Enciende un LED en el color indicado."""
-    led[0].value(r)
-    led[1].value(g)
-    led[2].value(b)
-
-def turn_off_led(led):
-    """Apaga LED"""
-    set_led_color(led, 0, 0, 0)
-
-#Código de legado
-def hex_to_rgb565(hex_color): 
-    """Convierte un color hexadecimal #RRGGBB a tupla (r,g,b) en rango 0-65535."""
-    hex_color = hex_color.lstrip('#')
-    r = int(hex_color[0:2], 16) * 257
-    g = int(hex_color[2:4], 16) * 257
-    b = int(hex_color[4:6], 16) * 257
-    return (r, g, b)
-
-def hex_to_bin_rgb(hex_color):
-    """Convierte un color hexadecimal #RRGGBB a tupla binaria (r,g,b) 0/1"""
-    hex_color = hex_color.lstrip('#')
-    r = 1 if int(hex_color[0:2], 16) > 127 else 0
-    g = 1 if int(hex_color[2:4], 16) > 127 else 0
-    b = 1 if int(hex_color[4:6], 16) > 127 else 0
-    return (r, g, b)
-
-def finger_to_led_index(finger):
-    """Mapea nombre de dedo a índice de LED/motor."""
-    return {
-        "pinky":  0,  # LED1
-        "ring":   1,  # LED2
-        "middle": 2,  # LED3
-        "index":  3,  # LED4
-        "thumb":  4   # LED5
-    }.get(finger, None)
-
-
-# =============================
-# Filtrado de sensores
-# ==============================
+# ================================
+# PERFIL DE ARRANQUE
+# ================================
 
-def read_sensors():
-    """Lectura de sensores aplicando histeresis y debounce. Devuelve lista de 5 bool."""
-    pressed = [False]*5
-
-    # --- Analógicos con histeresis ---
-    for i in range(3):
-        raw = sensors[i].read_u16()
-        if analog_state[i]:
-            analog_state[i] = raw > THRESH_OFF
-        else:
-            analog_state[i] = raw > THRESH_ON
-        pressed[i] = analog_state[i]
-
-    # --- Digitales con debounce ---
-    now = time.ticks_ms()
-    for j in range(2):
-        idx = 3 + j
-        val = sensors[idx].value() == 1
-        if val != digital_state[j] and time.ticks_diff(now, last_change_ms[j]) >= DEBOUNCE_MS:
-            digital_state[j] = val
-            last_change_ms[j] = now
-        pressed[idx] = digital_state[j]
-
-    return pressed
+# Checkpoints (etiqueta, ticks_ms) de cada fase del arranque. Todo se mide
+# desde BOOT_T0: tras un soft reset (Thonny) ticks_ms no vuelve a 0
+boot_marks = []
+
+def boot_mark(label):
+    """Registra un checkpoint de arranque con ticks_ms"""
+    boot_marks.append((label, time.ticks_ms()))
+
+def print_boot_report():
+    """Imprime la duración de cada fase del arranque desde BOOT_T0"""
+    print("\n=== PERFIL DE ARRANQUE ===")
+    # Solo tras un ciclo de energía real esto es el tiempo desde el encendido
+    print(f"uptime al cargar firmware  {BOOT_T0} ms")
+    prev = BOOT_T0
+    for label, t in boot_marks:
+        print(f"{label:<24} +{time.ticks_diff(t, prev):>6} ms  (t={time.ticks_diff(t, BOOT_T0)} ms)")
+        prev = t
+    print("==========================\n")
 
 # =============================
 # MQTT
@@ -208,13 +136,14 @@ def on_mqtt_message(topic, msg):
     """Callback para mensajes entrantes."""
     try:
         data = ujson.loads(msg)
+
+        # La web manda sobre los actuadores: cortar la prueba de arranque
+        stop_selftest()
         
         # Manejar mensaje vacío (optimización de payload)
         if "__empty" in data:
             # Apagar todos los LEDs y motores
-            for i in range(5):
-                turn_off_led(leds[i])
-                motors[i].duty_u16(0)
+            all_actuators_off()
             return
         
         for finger, info in data.items():
@@ -244,41 +173,27 @@ def on_mqtt_message(topic, msg):
 
             if led_index is not None and 0 <= led_index < len(leds):
                 if pressed:
-                    set_led_color(leds[led_index], r, g, b)
-                    motors[led_index].duty_u16(freq)
+                    set_actuator(led_index, r, g, b, freq)
                 else:
-                    turn_off_led(leds[led_index])
-                    motors[led_index].duty_u16(0)
+                    turn_off_actuator(led_index)
                     
     except Exception as e:
         print(f"[ERROR] on_mqtt_message: {e}")
 
-def mqtt_connect():
-    """Conecta al broker MQTT con reintentos"""
-    max_attempts = 5
-    for attempt in range(max_attempts):
-        try:
-            print(f"Conectando MQTT a {BROKER_IP} (intento {attempt + 1}/{max_attempts})...")
-            c = MQTTClient(client_id=b'PicoClient',
-                           server=BROKER_IP, port=BROKER_PORT,
-                           user=None, password=None,
-                           keepalive=60, ssl=False)
-            c.set_callback(on_mqtt_message)
-            c.connect()
-            c.subscribe(TOPIC_FEEDBACK, qos=0)  # QoS 0 = más rápido
-            print("[MQTT] Conectado exitosamente.")
-            return c
-        except Exception as e:
-            print(f"[MQTT] Error: {e}")
-            time.sleep(3)
-    print(" [MQTT] Conexión fallida después de varios intentos.")
-    return None
-
-def publish_states_if_changed(client, pressed, last_pressed):
+def mqtt_manager():
+    """Crea el gestor de conexión MQTT (backoff, pings y buffer de flancos)"""
+    return MQTTManager(client_id=b'PicoClient',
+                       server=BROKER_IP, port=BROKER_PORT,
+                       keepalive=60, ssl=False,
+                       topic_pub=TOPIC_ESTADO, topic_sub=TOPIC_FEEDBACK,
+                       callback=on_mqtt_message,
+                       # Broker local: la PC se une al AP segundos después del
+                       # arranque; reintentos cada <= 1 s para no demorar el
+                       # primer estado (el tope por defecto llega a 8 s)
+                       backoff_max_ms=1000)
+
+def publish_states_if_changed(mqtt, pressed, last_pressed):
     """Publica el estado de los dedos si hubo cambios y registra timestamps."""
-    if not client:
-        return last_pressed
-    
     # Publicar solo si hay cambios reales
     if pressed == last_pressed:
         return last_pressed
@@ -286,91 +201,100 @@ def publish_states_if_changed(client, pressed, last_pressed):
     timestamp = time.ticks_ms()
     finger_names = ["pinky", "ring", "middle", "index", "thumb"]
     
-    payload = {
-        "pinky":  pressed[0],
-        "ring":   pressed[1],
-        "middle": pressed[2],
-        "index":  pressed[3],
-        "thumb":  pressed[4],
-    }
-    
     # *** REGISTRAR TIMESTAMPS PARA MEDICIÓN DE LATENCIA ***
     for i, finger in enumerate(finger_names):
         if pressed[i] and not last_pressed[i]:  # Detectar flanco de subida
             record_finger_press(finger, timestamp)
     
-    try:
-        client.publish(TOPIC_ESTADO, ujson.dumps(payload), qos=0)
-    except Exception as e:
-        print(f"[MQTT] Error publicando: {e}")
+    # Sin enlace el gestor guarda el flanco y lo reenvía al reconectar
+    mqtt.publish_state(pressed, timestamp)
 
     return pressed[:]
 
-# =============================
-# Configuración WiFi Access Point
-# =============================
-
-def wifi_ap_mode():
-    """Configura el Pico W como Access Point"""
-    print("[WIFI] Configurando Access Point...")
-    
-    # Desactivar modo cliente
-    wlan_sta = network.WLAN(network.STA_IF)
-    wlan_sta.active(False)
-    
-    # Configurar Access Point
-    ap = network.WLAN(network.AP_IF)
-    ap.config(
-        essid=AP_SSID,
-        password=AP_PASSWORD)
-    ap.ifconfig((AP_IP, "255.255.255.0", AP_IP, "8.8.8.8"))
-    ap.active(True)
-    time.sleep(1)
-    
-    print(f"[WIFI] AP '{AP_SSID}' activo en {ap.ifconfig()[0]}")
-
-    # Verificar que esté activo
-    timeout = 8
-    start_time = time.time()
-    while not ap.active():
-        if time.time() - start_time > timeout:
-            raise Exception("No se pudo activar Access Point")
-        time.sleep(0.5)
-    
-    config = ap.ifconfig()
-    print("=== ACCESS POINT ACTIVO ===")
-    print(f"SSID: '{AP_SSID}'")
-    print(f"Password: '{AP_PASSWORD}'")
-    print(f"IP del Pico: {config[0]}")
-    print(f"Rango DHCP: 192.168.4.2-192.168.4.10")
-    print("¡Conecta tu PC a esta red WiFi!")
-    print("===============================")
-    
-    return ap
-
 # ================================================================
 # PATRÓN DE INICIO
 # ================================================================
 
+# Estado de la prueba de actuadores cuando corre en el segundo núcleo
+selftest_running = False
+selftest_abort = False
+
+def selftest_sleep(seconds):
+    """Espera en pasos cortos; devuelve True si se pidió abortar la prueba"""
+    end = time.ticks_add(time.ticks_ms(), int(seconds * 1000))
+    while time.ticks_diff(end, time.ticks_ms()) > 0:
+        if selftest_abort:
+            return True
+        time.sleep_ms(20)
+    return selftest_abort
+
 def startup_pattern():
     """Patrón de inicio - testea LEDs y motores secuencialmente y en grupo"""
     print("Iniciando patrón de LEDs y motores...")
     for i, led in enumerate(leds):
-        time.sleep(0.4)
+        if selftest_sleep(0.4): break
         # Rojo, verde, azul secuencial
-        set_led_color(led, 1,0,0); motors[i].duty_u16(10000); time.sleep(0.2)
-        set_led_color(led, 0,1,0); motors[i].duty_u16(20000); time.sleep(0.2)
-        set_led_color(led, 0,0,1); motors[i].duty_u16(30000); time.sleep(0.2)
-        turn_off_led(led); motors[i].duty_u16(0); time.sleep(0.2)
+        set_led_color(led, 1,0,0); motors[i].duty_u16(10000)
+        if selftest_sleep(0.2): break
+        set_led_color(led, 0,1,0); motors[i].duty_u16(20000)
+        if selftest_sleep(0.2): break
+        set_led_color(led, 0,0,1); motors[i].duty_u16(30000)
+        if selftest_sleep(0.2): break
+        turn_off_led(led); motors[i].duty_u16(0)
+        if selftest_sleep(0.2): break
     # Todos juntos
     for i in range(3):
+        if selftest_abort: break
         for led in leds: set_led_color(led,1,1,1)
         for motor in motors: motor.duty_u16(i*20000)
-        time.sleep(0.3)
+        if selftest_sleep(0.3): break
         for led in leds: turn_off_led(led)
         for motor in motors: motor.duty_u16(0)
-        time.sleep(0.3)
-    print("Patrón completado")
+        if selftest_sleep(0.3): break
+    all_actuators_off()
+    print("Patrón interrumpido" if selftest_abort else "Patrón completado")
+
+def _selftest_worker():
+    """Hilo del segundo núcleo: corre el patrón y marca su fin"""
+    global selftest_running
+    try:
+        startup_pattern()
+    finally:
+        selftest_running = False
+
+def start_selftest():
+    """Lanza la prueba de actuadores en paralelo (o bloqueante si no hay _thread)"""
+    global selftest_running
+    if _thread is None:
+        startup_pattern()
+        return
+    selftest_running = True
+    _thread.start_new_thread(_selftest_worker, ())
+
+def stop_selftest():
+    """Aborta la prueba en curso y espera a que libere los actuadores"""
+    global selftest_abort
+    if not selftest_running:
+        return
+    selftest_abort = True
+    while selftest_running:
+        time.sleep_ms(5)
+
+def consume_clean_shutdown():
+    """Devuelve True si el apagado anterior fue limpio y borra la marca"""
+    try:
+        os.remove(CLEAN_SHUTDOWN_FILE)
+        return True
+    except OSError:
+        return False
+
+def mark_clean_shutdown():
+    """Deja la marca de apagado limpio para el siguiente arranque"""
+    try:
+        with open(CLEAN_SHUTDOWN_FILE, "w") as f:
+            f.write("1")
+    except OSError as e:
+        print(f"[BOOT] No se pudo guardar marca de apagado: {e}")
 
 
 # ================================
@@ -379,49 +303,83 @@ def startup_pattern():
 def main():
 
    # --- Inicialización --- 
+    boot_mark("inicio main")
     print("=== INICIANDO HAPTIC GLOVE ===")
     init_motors()
-    startup_pattern()
+
+    # Reposo de cada FSR antes de que la prueba de actuadores mueva los motores
+    calibrate_baseline()
+    print_calibration()
+    boot_mark("calibración")
+
+    if not FAST_BOOT:
+        startup_pattern()
+    elif consume_clean_shutdown():
+        print("[BOOT] Apagado limpio previo: se omite prueba de actuadores.")
+    else:
+        start_selftest()
+    boot_mark("prueba actuadores")
 
     wifi_ap_mode()
-    client = mqtt_connect()
+    boot_mark("access point")
 
-    last_pressed = [False]*5
+    print(f"Conectando MQTT a {BROKER_IP}...")
+    mqtt = mqtt_manager()
+    mqtt.wait_connected(15000)
+    boot_mark("broker mqtt")
+
+    # None fuerza la publicación del primer estado en la primera vuelta
+    last_pressed = [None]*5
     LOOP_DT, PUB_MS = 0.001, 40
     
-    t_pub = time.ticks_ms()
+    t_pub = time.ticks_add(time.ticks_ms(), -PUB_MS)
     t_stats = time.ticks_ms()
     STATS_INTERVAL = 10000  # Imprimir estadísticas cada 10 segundos
-
-    if client:
-        client.set_callback(on_mqtt_message)
+    t_calib = time.ticks_ms()
+    CALIB_INTERVAL = 5000   # Seguimiento del reposo de los FSR cada 5 segundos
+    boot_reported = False
 
     print("[MAIN] Sistema en ejecución.")
-    print(f"[CONFIG] Loop: {int(LOOP_DT*1000)}ms | Publicación: {PUB_MS}ms")
+    print(f"[CONFIG] Loop: {int(LOOP_DT*1000)}ms | Publicación: {PUB_MS}ms | Driver: {'native' if NATIVE else 'python'}")
 
     # --- Bucle principal ---
-    while True:
-        pressed = read_sensors()
-        
-        # Publicar si ha pasado el intervalo
-        if time.ticks_diff(time.ticks_ms(), t_pub) >= PUB_MS:
-            last_pressed = publish_states_if_changed(client, pressed, last_pressed)
-            t_pub = time.ticks_ms()
-
-        # Imprimir estadísticas periódicamente
-        if time.ticks_diff(time.ticks_ms(), t_stats) >= STATS_INTERVAL:
-            print_latency_stats(reset=True)
-            t_stats = time.ticks_ms()
-        
-        # Procesar mensajes MQTT (CRÍTICO: antes del sleep para mínima latencia)
-        if client:
-            try:
-                client.check_msg()
-            except Exception as e:
-                print("[MQTT] check_msg error:", e)
-                client = mqtt_connect()  # reintento si falla
-
-        time.sleep(LOOP_DT)
+    try:
+        while True:
+            pressed = read_sensors()
+            
+            # Publicar si ha pasado el intervalo
+            if time.ticks_diff(time.ticks_ms(), t_pub) >= PUB_MS:
+                last_pressed = publish_states_if_changed(mqtt, pressed, last_pressed)
+                t_pub = time.ticks_ms()
+
+                if not boot_reported and mqtt.published:
+                    boot_mark("primer estado publicado")
+                    print_boot_report()
+                    boot_reported = True
+
+            # Imprimir estadísticas periódicamente
+            if time.ticks_diff(time.ticks_ms(), t_stats) >= STATS_INTERVAL:
+                print_latency_stats(reset=True)
+                mqtt.print_stats()
+                t_stats = time.ticks_ms()
+            
+            # Recalibración periódica del reposo (solo canales sueltos)
+            if time.ticks_diff(time.ticks_ms(), t_calib) >= CALIB_INTERVAL:
+                track_baseline()
+                t_calib = time.ticks_ms()
+
+            # Procesar mensajes MQTT (CRÍTICO: antes del sleep para mínima latencia)
+            # El gestor hace pings y reconecta con backoff; el connect TCP avanza
+            # un paso por vuelta sin frenar el sensado
+            mqtt.service()
+
+            time.sleep(LOOP_DT)
+    except KeyboardInterrupt:
+        # Detenido desde Thonny: apagar actuadores y dejar marca de apagado limpio
+        stop_selftest()
+        all_actuators_off()
+        mark_clean_shutdown()
+        print("[MAIN] Apagado limpio.")
 
 # ================================================================
 # ENTRY POINT
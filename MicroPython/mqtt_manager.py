@@ -0,0 +1,402 @@
+# Haptic Glove - Gestor de conexión MQTT
+# Reconexión con backoff exponencial + jitter, pings proactivos, chequeo de
+# salud y buffer circular de flancos mientras el enlace está caído.
+import time, ujson, network, socket, select, struct, errno
+from array import array
+from random import getrandbits
+from umqtt.simple import MQTTClient
+from glove import FINGERS
+
+# Fases de un intento de conexión en curso
+_TCP = 0        # esperando que el socket quede escribible (TCP establecido)
+_CONNACK = 1    # CONNECT enviado, esperando los 4 bytes del CONNACK
+
+
+def _connect_packet(client_id, user, password, keepalive):
+    """Paquete CONNECT de MQTT 3.1.1 con sesión limpia (el mismo que arma umqtt)."""
+    def field(b):
+        if isinstance(b, str):
+            b = b.encode()
+        return struct.pack("!H", len(b)) + b
+
+    flags = 0x02
+    payload = field(client_id)
+    if user:
+        flags |= 0x80
+        payload += field(user)
+        if password:
+            flags |= 0x40
+            payload += field(password)
+    body = field(b"MQTT") + bytes([4, flags]) + struct.pack("!H", keepalive) + payload
+
+    # Longitud restante en formato variable (7 bits por byte)
+    header = bytearray(b"\x10")
+    n = len(body)
+    while True:
+        byte = n & 0x7F
+        n >>= 7
+        header.append(byte | 0x80 if n else byte)
+        if not n:
+            break
+    return bytes(header) + body
+
+
+class _RxSocket:
+    """Envuelve el socket de umqtt y anota cuándo llegó el último byte del broker.
+
+    umqtt.simple devuelve None tanto para "sin datos" como para PINGRESP, así
+    que la única forma de ver que el broker sigue vivo es mirar las lecturas.
+    """
+
+    def __init__(self, sock, manager):
+        self._sock = sock
+        self._manager = manager
+
+    def read(self, n):
+        data = self._sock.read(n)
+        if data:
+            self._manager.last_rx_ms = time.ticks_ms()
+        return data
+
+    def write(self, *args):
+        return self._sock.write(*args)
+
+    def setblocking(self, flag):
+        self._sock.setblocking(flag)
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+class MQTTManager:
+    """Envuelve MQTTClient y mantiene viva la conexión.
+
+    El connect TCP y la espera del CONNACK avanzan un paso por cada service()
+    sobre un socket no bloqueante, así el lazo de sensado sigue corriendo
+    durante un corte. Lo que todavía bloquea, acotado por connect_timeout_ms:
+    la resolución DNS de un nombre (solo la primera vez), el handshake TLS y
+    el SUBACK (un ida y vuelta con el broker ya conectado).
+    """
+
+    def __init__(self, client_id, server, port=1883, user=None, password=None,
+                 keepalive=60, ssl=False, ssl_params=None,
+                 topic_pub=b'picow/fingers', topic_sub=None, callback=None,
+                 wlan=None, wifi_ssid=None, wifi_password=None, buffer_size=64,
+                 backoff_min_ms=250, backoff_max_ms=8000, connect_timeout_ms=1500):
+        self.client = MQTTClient(client_id=client_id, server=server, port=port,
+                                 user=user, password=password,
+                                 keepalive=keepalive, ssl=ssl,
+                                 ssl_params=ssl_params or {})
+        if callback:
+            self.client.set_callback(callback)
+        self.server = server
+        self.port = port
+        self.ssl = ssl
+        self.ssl_params = ssl_params or {}
+        self.addr = None    # se resuelve una vez y se reutiliza
+        self.connect_pkt = _connect_packet(client_id, user, password, keepalive)
+        self.topic_pub = topic_pub
+        self.topic_sub = topic_sub
+        self.wlan = wlan   # si se da, su isconnected() forma parte de la salud
+        self.wifi_ssid = wifi_ssid          # credenciales para reasociar el STA
+        self.wifi_password = wifi_password
+
+        # Ping cada medio keepalive aunque se esté publicando: las publicaciones
+        # QoS 0 no tienen respuesta y el PINGRESP es la prueba de que el broker
+        # sigue ahí. Sin nada entrante en 1.5x keepalive el enlace se da por muerto
+        self.ping_ms = keepalive * 1000 // 2
+        self.rx_timeout_ms = keepalive * 1500
+        self.backoff_min_ms = backoff_min_ms
+        self.backoff_max_ms = backoff_max_ms
+        # Tope por intento de conexión (TCP + CONNACK, y lo que sí bloquea)
+        self.connect_timeout_ms = connect_timeout_ms
+        self.connect_timeout_s = connect_timeout_ms / 1000
+
+        self.connected = False
+        self.pending = None         # socket del intento en curso
+        self.poller = None
+        self.phase = _TCP
+        self.connack = b""
+        self.attempt_ms = 0
+        self.failures = 0
+        self.next_attempt_ms = time.ticks_ms()
+        self.last_ping_ms = time.ticks_ms()
+        self.last_rx_ms = time.ticks_ms()
+        self.last_mask = -1
+
+        # Buffer circular preasignado: máscara de dedos + ticks_ms original
+        self.buf_mask = bytearray(buffer_size)
+        self.buf_t = array('i', [0] * buffer_size)
+        self.buf_head = 0
+        self.buf_count = 0
+
+        # Estadísticas
+        self.published = 0
+        self.dropped = 0
+        self.reconnects = 0
+
+    # ----------- Conexión -----------
+
+    def connect(self):
+        """Arranca un intento de conexión sin esperar; service() lo hace avanzar."""
+        if self.wlan is not None and not self.wlan.isconnected():
+            self._reconnect_wifi()
+            self._schedule_retry()
+            return False
+
+        try:
+            if self.addr is None:
+                # Con IP literal es inmediato; un nombre DNS bloquea esta vez
+                self.addr = socket.getaddrinfo(self.server, self.port)[0][-1]
+            self.pending = socket.socket()
+            self.pending.setblocking(False)
+            try:
+                self.pending.connect(self.addr)
+            except OSError as e:
+                if e.args[0] != errno.EINPROGRESS:
+                    raise
+            self.poller = select.poll()
+            self.poller.register(self.pending, select.POLLOUT)
+            self.phase = _TCP
+            self.connack = b""
+            self.attempt_ms = time.ticks_ms()
+        except Exception as e:
+            self._connect_failed(e)
+        return False
+
+    def _advance_connect(self):
+        """Un paso del intento en curso (TCP -> CONNECT -> CONNACK) sin esperar."""
+        if time.ticks_diff(time.ticks_ms(), self.attempt_ms) > self.connect_timeout_ms:
+            self._connect_failed("timeout")
+            return
+        try:
+            events = self.poller.poll(0)
+            if not events:
+                return
+            if events[0][1] & (select.POLLERR | select.POLLHUP):
+                raise OSError("conexión rechazada")
+
+            if self.phase == _TCP:
+                if self.ssl:
+                    # El handshake TLS no es incremental: bloquea con timeout
+                    self.pending = self._wrap_tls(self.pending)
+                    self.pending.write(self.connect_pkt)
+                    self._finish_connect(self.pending.read(4))
+                    return
+                if self.pending.write(self.connect_pkt) != len(self.connect_pkt):
+                    raise OSError("CONNECT incompleto")
+                self.poller.modify(self.pending, select.POLLIN)
+                self.phase = _CONNACK
+                return
+
+            data = self.pending.read(4 - len(self.connack))
+            if data is None:
+                return
+            if not data:
+                raise OSError("el broker cerró la conexión")
+            self.connack += data
+            if len(self.connack) == 4:
+                self._finish_connect(self.connack)
+        except Exception as e:
+            self._connect_failed(e)
+
+    def _wrap_tls(self, sock):
+        """Handshake TLS sobre el socket ya conectado (ssl=True o un SSLContext)."""
+        sock.settimeout(self.connect_timeout_s)
+        if self.ssl is True:
+            import ssl
+            return ssl.wrap_socket(sock, **self.ssl_params)
+        return self.ssl.wrap_socket(sock, server_hostname=self.server)
+
+    def _finish_connect(self, resp):
+        """Valida el CONNACK, entrega el socket a umqtt y se suscribe."""
+        if not resp or len(resp) != 4 or resp[0] != 0x20 or resp[1] != 0x02:
+            raise OSError("CONNACK inválido")
+        if resp[3]:
+            raise OSError(f"el broker rechazó la sesión (código {resp[3]})")
+
+        # umqtt espera un socket bloqueante; el timeout acota la espera del SUBACK
+        self.pending.settimeout(self.connect_timeout_s)
+        self.client.sock = _RxSocket(self.pending, self)
+        if self.topic_sub:
+            self.client.subscribe(self.topic_sub, qos=0)  # QoS 0 = más rápido
+        self.pending = None
+        self.poller = None
+
+        if self.failures:
+            self.reconnects += 1
+        self.connected = True
+        self.failures = 0
+        self.last_ping_ms = time.ticks_ms()
+        self.last_rx_ms = time.ticks_ms()
+        print("[MQTT] Conectado exitosamente.")
+        self.flush()
+
+    def _connect_failed(self, reason):
+        """Descarta el intento en curso y agenda el siguiente con backoff."""
+        print(f"[MQTT] Error conectando: {reason}")
+        if self.pending is not None:
+            try:
+                self.pending.close()
+            except Exception:
+                pass
+        self.pending = None
+        self.poller = None
+        self._schedule_retry()
+
+    def _reconnect_wifi(self):
+        """Relanza la asociación WiFi (no bloquea) si no hay una en curso."""
+        if self.wifi_ssid is None:
+            return
+        if self.wlan.status() == network.STAT_CONNECTING:
+            return
+        print("[WIFI] Reasociando...")
+        try:
+            self.wlan.connect(self.wifi_ssid, self.wifi_password)
+        except OSError as e:
+            print(f"[WIFI] Error reasociando: {e}")
+
+    def wait_connected(self, timeout_ms):
+        """Reintenta (con backoff) hasta conectar o agotar timeout_ms."""
+        start = time.ticks_ms()
+        while not self.connected:
+            if time.ticks_diff(time.ticks_ms(), start) >= timeout_ms:
+                print("[MQTT] Sin broker todavía; se reintentará en segundo plano.")
+                return False
+            self.service()
+            time.sleep_ms(10)
+        return True
+
+    def _schedule_retry(self):
+        """Backoff exponencial con 'equal jitter' para no sincronizar clientes."""
+        delay = min(self.backoff_max_ms, self.backoff_min_ms << min(self.failures, 8))
+        half = delay // 2
+        delay = half + getrandbits(16) % (half + 1)
+        self.failures += 1
+        self.next_attempt_ms = time.ticks_add(time.ticks_ms(), delay)
+
+    def _mark_down(self, reason):
+        """Cierra el socket y pasa a modo reconexión."""
+        print(f"[MQTT] Enlace caído ({reason}); reintentando con backoff.")
+        self.connected = False
+        try:
+            self.client.sock.close()
+        except Exception:
+            pass
+        self._schedule_retry()
+
+    def healthy(self):
+        """True si hay sesión MQTT, el broker respondió hace poco y (si aplica) hay WiFi."""
+        if not self.connected:
+            return False
+        if time.ticks_diff(time.ticks_ms(), self.last_rx_ms) > self.rx_timeout_ms:
+            return False
+        return self.wlan is None or self.wlan.isconnected()
+
+    def service(self):
+        """Llamar en cada vuelta del lazo: mensajes, pings y reconexión."""
+        now = time.ticks_ms()
+        if not self.connected:
+            if self.pending is not None:
+                self._advance_connect()
+            elif time.ticks_diff(now, self.next_attempt_ms) >= 0:
+                self.connect()
+            return
+
+        if not self.healthy():
+            if self.wlan is not None and not self.wlan.isconnected():
+                self._mark_down("WiFi desconectado")
+            else:
+                self._mark_down("sin respuesta del broker")
+            return
+
+        try:
+            self.client.check_msg()
+            if time.ticks_diff(now, self.last_ping_ms) >= self.ping_ms:
+                self.client.ping()
+                self.last_ping_ms = now
+        except Exception as e:
+            self._mark_down(e)
+
+    # ----------- Publicación -----------
+
+    def _payload(self, mask, t, replay=False):
+        """JSON con booleanos por dedo y el ticks_ms en que ocurrió el cambio."""
+        payload = {}
+        for i, finger in enumerate(FINGERS):
+            payload[finger] = bool(mask & (1 << i))
+        payload["t"] = t
+        if replay:
+            payload["replay"] = True
+        return ujson.dumps(payload)
+
+    def publish_state(self, pressed, timestamp):
+        """Publica el estado; si no hay enlace lo guarda como flanco en el buffer.
+
+        Devuelve True si se envió en vivo.
+        """
+        mask = 0
+        for i in range(len(FINGERS)):
+            if pressed[i]:
+                mask |= 1 << i
+        changed = mask != self.last_mask
+        self.last_mask = mask
+
+        if self.connected and self.flush():
+            try:
+                self.client.publish(self.topic_pub, self._payload(mask, timestamp), qos=0)
+                self.published += 1
+                return True
+            except Exception as e:
+                self._mark_down(e)
+
+        if changed:
+            self._buffer_push(mask, timestamp)
+        return False
+
+    def _buffer_push(self, mask, t):
+        """Agrega al final; si está lleno descarta el flanco más viejo."""
+        size = len(self.buf_mask)
+        if self.buf_count == size:
+            self.buf_head = (self.buf_head + 1) % size
+            self.buf_count -= 1
+            self.dropped += 1
+        tail = (self.buf_head + self.buf_count) % size
+        self.buf_mask[tail] = mask
+        self.buf_t[tail] = t
+        self.buf_count += 1
+
+    def flush(self):
+        """Envía en orden los flancos guardados. True si el buffer quedó vacío.
+
+        La web no usa los flancos "replay" como toques en vivo, así que tras
+        reenviarlos se publica el estado actual sin la marca.
+        """
+        size = len(self.buf_mask)
+        if not self.buf_count:
+            return True
+        print(f"[MQTT] Enviando {self.buf_count} flancos guardados ({self.dropped} descartados).")
+        while self.buf_count:
+            i = self.buf_head
+            try:
+                self.client.publish(self.topic_pub,
+                                    self._payload(self.buf_mask[i], self.buf_t[i], True), qos=0)
+            except Exception as e:
+                self._mark_down(e)
+                return False
+            self.published += 1
+            self.buf_head = (i + 1) % size
+            self.buf_count -= 1
+        try:
+            self.client.publish(self.topic_pub,
+                                self._payload(self.last_mask, time.ticks_ms()), qos=0)
+        except Exception as e:
+            self._mark_down(e)
+            return False
+        self.published += 1
+        return True
+
+    def print_stats(self):
+        """Imprime contadores de la conexión"""
+        print(f"[MQTT] enlace={'ok' if self.healthy() else 'caído'} | publicados={self.published} | "
+              f"en buffer={self.buf_count} | descartados={self.dropped} | reconexiones={self.reconnects}")
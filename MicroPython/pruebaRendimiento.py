@@ -0,0 +1,38 @@
+# Micro-benchmark del driver del guante
+# Compara iteraciones por segundo del lazo de sensado/actuadores entre la
+# versión en Python puro y la compilada (glove_native.py).
+import time
+import gc
+import glove
+
+ITERATIONS = 5000
+
+
+def bench(name, read_fn, apply_fn):
+    """Corre ITERATIONS vueltas de lectura + escritura de actuadores."""
+    args = (glove.analog, glove.digital, glove.raw, glove.ring, glove.filter_ctl,
+            glove.filt, glove.thresh, glove.state, glove.last_change_ms,
+            glove.OVERSAMPLE, glove.DEBOUNCE_MS)
+    leds, motors = glove.leds, glove.motors
+    gc.collect()
+    t0 = time.ticks_us()
+    for _ in range(ITERATIONS):
+        state = read_fn(*args)
+        for i in range(glove.N_CHANNELS):
+            apply_fn(leds[i], motors[i], 0, 0, 0, state[i])
+    dt = time.ticks_diff(time.ticks_us(), t0)
+    rate = ITERATIONS * 1000000 / dt
+    print(f"{name:<8} {dt / ITERATIONS:8.1f} us/iter  {rate:10.0f} iter/s")
+    return rate
+
+
+print("=== BENCHMARK DRIVER GUANTE ===")
+glove.init_motors()
+py_rate = bench("python", glove._read_sensors_py, glove._apply_py)
+if glove.NATIVE:
+    native_rate = bench("native", glove._read_sensors, glove._apply)
+    print(f"Aceleración: x{native_rate / py_rate:.2f}")
+else:
+    print("Emisor nativo no disponible: solo versión Python.")
+glove.all_actuators_off()
+print("===============================")
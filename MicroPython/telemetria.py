@@ -0,0 +1,74 @@
+# Haptic Glove - Modo diagnóstico: telemetría cruda de sensores
+# Muestrea los 5 canales a frecuencia fija y envía lotes binarios por UDP a la
+# PC (ver tools/telemetry_recorder.py). Sirve para ver las curvas del ADC al
+# ajustar umbrales, sin pasar por el serial USB.
+#
+# Lote:  "HG" | versión u8 | n_frames u8 | n_frames * frame
+# Frame: seq u32 | ticks_us u32 | ch0..ch4 u16   (little-endian, 18 bytes)
+#        ch0..ch2 = read_u16() crudo, ch3..ch4 = digital 0/1
+import time, socket, struct
+import glove
+from wifi_ap import wifi_ap_mode, HOST_IP
+
+# ----------- Configuración -----------
+HOST_PORT = 5005
+SAMPLE_HZ = 2000
+BATCH_FRAMES = 32           # 4 + 32*18 = 580 bytes por datagrama
+
+MAGIC = b"HG"
+VERSION = 1
+HEADER_FMT = "<2sBB"
+FRAME_FMT = "<IIHHHHH"
+HEADER_SIZE = struct.calcsize(HEADER_FMT)
+FRAME_SIZE = struct.calcsize(FRAME_FMT)
+
+
+def stream():
+    """Muestrea a SAMPLE_HZ y envía lotes hasta Ctrl+C."""
+    period_us = 1000000 // SAMPLE_HZ
+    a0, a1, a2 = glove.analog
+    d0, d1 = glove.digital
+
+    # Buffer del lote preasignado; la cabecera es fija (siempre lotes completos)
+    batch = bytearray(HEADER_SIZE + BATCH_FRAMES * FRAME_SIZE)
+    struct.pack_into(HEADER_FMT, batch, 0, MAGIC, VERSION, BATCH_FRAMES)
+    addr = socket.getaddrinfo(HOST_IP, HOST_PORT)[0][-1]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    seq = 0
+    n = 0
+    send_errors = 0
+    t_next = time.ticks_us()
+    print(f"[TELEMETRÍA] {SAMPLE_HZ} Hz -> {HOST_IP}:{HOST_PORT} (lotes de {BATCH_FRAMES})")
+    try:
+        while True:
+            # Espera activa hasta el siguiente instante de muestreo
+            while time.ticks_diff(t_next, time.ticks_us()) > 0:
+                pass
+            t_next = time.ticks_add(t_next, period_us)
+
+            struct.pack_into(FRAME_FMT, batch, HEADER_SIZE + n * FRAME_SIZE,
+                             seq, time.ticks_us(),
+                             a0.read_u16(), a1.read_u16(), a2.read_u16(),
+                             d0.value(), d1.value())
+            seq = (seq + 1) & 0xFFFFFFFF
+            n += 1
+
+            if n == BATCH_FRAMES:
+                try:
+                    sock.sendto(batch, addr)
+                except OSError:
+                    # El receptor ve el hueco en seq; no frenamos el muestreo
+                    send_errors += 1
+                n = 0
+                # Si el envío tardó más de un periodo, reanclar para no ráfagas
+                if time.ticks_diff(time.ticks_us(), t_next) > period_us:
+                    t_next = time.ticks_us()
+    except KeyboardInterrupt:
+        sock.close()
+        print(f"[TELEMETRÍA] Detenido. Frames: {seq} | Errores de envío: {send_errors}")
+
+
+if __name__ == "__main__":
+    wifi_ap_mode()
+    stream()
@@ -0,0 +1,51 @@
+# Haptic Glove - Access Point del guante
+# Configuración de red compartida por mainMosco.py (firmware) y telemetria.py
+# (diagnóstico), sin arrastrar MQTT ni el resto del firmware.
+import time, network
+
+# ================================
+# Configuración de red
+# ================================
+AP_SSID = "HapticGlove"
+AP_PASSWORD = "12345678"
+AP_IP = "192.168.4.1"
+
+HOST_IP = '192.168.4.16'    # IP de tu PC cuando se conecte al AP (broker / telemetría)
+
+
+def wifi_ap_mode():
+    """Configura el Pico W como Access Point"""
+    print("[WIFI] Configurando Access Point...")
+
+    # Desactivar modo cliente
+    wlan_sta = network.WLAN(network.STA_IF)
+    wlan_sta.active(False)
+
+    # Configurar Access Point
+    ap = network.WLAN(network.AP_IF)
+    ap.config(
+        essid=AP_SSID,
+        password=AP_PASSWORD)
+    ap.ifconfig((AP_IP, "255.255.255.0", AP_IP, "8.8.8.8"))
+    ap.active(True)
+
+    # Verificar que esté activo (sondeo corto en vez de esperas fijas)
+    timeout_ms = 8000
+    start_time = time.ticks_ms()
+    while not ap.active():
+        if time.ticks_diff(time.ticks_ms(), start_time) > timeout_ms:
+            raise Exception("No se pudo activar Access Point")
+        time.sleep_ms(50)
+
+    print(f"[WIFI] AP '{AP_SSID}' activo en {ap.ifconfig()[0]}")
+
+    config = ap.ifconfig()
+    print("=== ACCESS POINT ACTIVO ===")
+    print(f"SSID: '{AP_SSID}'")
+    print(f"Password: '{AP_PASSWORD}'")
+    print(f"IP del Pico: {config[0]}")
+    print(f"Rango DHCP: 192.168.4.2-192.168.4.10")
+    print("¡Conecta tu PC a esta red WiFi!")
+    print("===============================")
+
+    return ap
@@ -0,0 +1,162 @@
+# Requiere: ffmpeg en el PATH y pip install numpy
+# Uso: python notes_sprite.py  (desde la carpeta conversion/)
+#
+# Qué hace:
+# - Decodifica cada public/notes/*.mp3 a PCM mono float32
+# - Recorta silencio al inicio/final y normaliza el pico
+# - Concatena todas las notas (con un hueco de silencio) en un solo sprite.mp3
+# - Escribe sprite.json con el inicio y la duración (segundos) de cada nota
+# - En una reconstrucción reutiliza las notas cuyo mp3 no cambió (cache por sha1)
+#
+# El front descarga y decodifica un solo archivo y toca cada nota con
+# AudioBufferSourceNode.start(0, start, length) (ver src/hooks/useAudio.js).
+
+import hashlib
+import json
+import os
+import subprocess
+
+import numpy as np
+
+NOTES_DIR = '../public/notes'
+SPRITE_OUT = 'sprite.mp3'              # dentro de NOTES_DIR
+INDEX_OUT = 'sprite.json'              # dentro de NOTES_DIR
+CACHE_DIR = '.sprite_cache'            # PCM ya procesado por nota
+
+SAMPLE_RATE = 44100
+GAP_S = 0.05                 # silencio entre notas (evita que se mezclen al cortar)
+SILENCE_DB = -50             # umbral de recorte relativo al pico de la nota
+PRE_ROLL_S = 0.002           # margen antes del ataque
+FADE_S = 0.01                # fade-out al final del recorte (evita clicks)
+PEAK_DBFS = -1.0             # pico tras normalizar
+MAX_LAG = 4096               # búsqueda del retraso del encoder mp3 (muestras)
+
+# Cualquier cambio aquí invalida la cache
+PARAMS = {
+    'sampleRate': SAMPLE_RATE, 'gap': GAP_S, 'silenceDb': SILENCE_DB,
+    'preRoll': PRE_ROLL_S, 'fade': FADE_S, 'peakDbfs': PEAK_DBFS,
+}
+
+
+def sha1_of(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def decode(path):
+    """Decodifica cualquier audio a PCM mono float32 a SAMPLE_RATE con ffmpeg."""
+    out = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-i', path, '-f', 'f32le', '-ac', '1',
+         '-ar', str(SAMPLE_RATE), '-'],
+        check=True, capture_output=True).stdout
+    return np.frombuffer(out, dtype=np.float32)
+
+
+def encode(pcm, path):
+    """Codifica PCM mono float32 a mp3."""
+    subprocess.run(
+        ['ffmpeg', '-v', 'error', '-y', '-f', 'f32le', '-ar', str(SAMPLE_RATE),
+         '-ac', '1', '-i', '-', '-codec:a', 'libmp3lame', '-q:a', '2', path],
+        input=pcm.astype(np.float32).tobytes(), check=True)
+
+
+def trim_and_normalize(x):
+    """Recorta silencio relativo al pico, aplica fade-out y normaliza."""
+    peak = float(np.max(np.abs(x))) if len(x) else 0.0
+    if peak == 0.0:
+        return np.zeros(0, dtype=np.float32)
+
+    loud = np.flatnonzero(np.abs(x) > peak * 10 ** (SILENCE_DB / 20))
+    start = max(int(loud[0]) - int(PRE_ROLL_S * SAMPLE_RATE), 0)
+    end = int(loud[-1]) + 1
+    y = x[start:end].astype(np.float32)
+
+    fade = min(int(FADE_S * SAMPLE_RATE), len(y))
+    if fade:
+        y[-fade:] *= np.linspace(1.0, 0.0, fade, dtype=np.float32)
+    return y * np.float32(10 ** (PEAK_DBFS / 20) / peak)
+
+
+def encoder_lag(reference, decoded):
+    """Muestras que el mp3 decodificado va retrasado respecto al PCM original."""
+    n = min(len(reference), len(decoded) - MAX_LAG, SAMPLE_RATE // 2)
+    if n <= 0:
+        return 0
+    ref = reference[:n]
+    scores = [float(np.dot(ref, decoded[lag:lag + n])) for lag in range(MAX_LAG)]
+    return int(np.argmax(scores))
+
+
+def load_previous_index(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def main():
+    sprite_path = os.path.join(NOTES_DIR, SPRITE_OUT)
+    index_path = os.path.join(NOTES_DIR, INDEX_OUT)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+
+    previous = load_previous_index(index_path)
+    prev_notes = previous.get('notes', {}) if previous.get('params') == PARAMS else {}
+
+    # 1) Procesamos cada nota (o la tomamos de la cache si su mp3 no cambió)
+    names = sorted(f[:-4] for f in os.listdir(NOTES_DIR)
+                   if f.endswith('.mp3') and f != SPRITE_OUT)
+    clips, hashes, reused = {}, {}, 0
+    for name in names:
+        src = os.path.join(NOTES_DIR, name + '.mp3')
+        cached = os.path.join(CACHE_DIR, name + '.f32')
+        digest = sha1_of(src)
+        hashes[name] = digest
+        if prev_notes.get(name, {}).get('sha1') == digest and os.path.exists(cached):
+            clips[name] = np.fromfile(cached, dtype=np.float32)
+            reused += 1
+        else:
+            clips[name] = trim_and_normalize(decode(src))
+            clips[name].tofile(cached)
+
+    # 2) Si nada cambió y el sprite existe, no volvemos a codificar
+    if reused == len(names) and set(prev_notes) == set(names) and os.path.exists(sprite_path):
+        print(f"Sin cambios: {len(names)} notas reutilizadas, {SPRITE_OUT} intacto.")
+        return
+
+    # 3) Concatenamos con huecos de silencio y anotamos offsets en muestras
+    gap = np.zeros(int(GAP_S * SAMPLE_RATE), dtype=np.float32)
+    parts, offsets, pos = [gap], {}, len(gap)
+    for name in names:
+        offsets[name] = (pos, len(clips[name]))
+        parts += [clips[name], gap]
+        pos += len(clips[name]) + len(gap)
+    pcm = np.concatenate(parts)
+
+    # 4) Codificamos y medimos el retraso del encoder para corregir los offsets
+    encode(pcm, sprite_path)
+    lag = encoder_lag(pcm, decode(sprite_path))
+
+    index = {
+        'file': SPRITE_OUT,
+        'sampleRate': SAMPLE_RATE,
+        'params': PARAMS,
+        'encoderLag': lag,
+        'notes': {
+            name: {
+                'start': round((start + lag) / SAMPLE_RATE, 6),
+                'length': round(length / SAMPLE_RATE, 6),
+                'sha1': hashes[name],
+            }
+            for name, (start, length) in offsets.items()
+        },
+    }
+    with open(index_path, 'w') as f:
+        json.dump(index, f, indent=2)
+
+    print(f"✅ Generado {SPRITE_OUT} ({len(pcm) / SAMPLE_RATE:.1f} s) con {len(names)} notas "
+          f"({reused} de cache), retraso del encoder = {lag} muestras.")
+
+
+if __name__ == '__main__':
+    main()
@@ -76,7 +76,7 @@ function Piano() {
 
   // Hook Audio
   const noteToFreq = useNoteToFreq(NOTES);
-  const { playNote, audioRefs } = usePlayNote();
+  const { playNote, audioRefs, spriteReady } = usePlayNote();
 
   // Hook MIDI
   useMIDI(
@@ -157,6 +157,7 @@ function Piano() {
   // EFFECTS
   //============================================================== 
   //Setup MQTT 
+  // Solo estados en vivo: los flancos "replay" de un corte no se puntúan ni suenan
   useEffect(() => {
     connectMQTT(data => {
       setFingerStatus(data);
@@ -305,12 +306,13 @@ function Piano() {
           ))}
         </div>
 
-        {/* Audios precargados para minimizar latencia al tocar */}
+        {/* Audios precargados; con el sprite listo (usePlayNote) quedan de respaldo sin precarga */}
         <div style={{ display: "none" }}>
           {NOTES.map((note, i) => (
             <audio
               key={i}
               id={`audio-${note}`}
+              preload={spriteReady ? "none" : "auto"}
               src={`../../notes/${note}.mp3`}
               ref={el => (audioRefs.current[note] = el)}
             />
@@ -1,4 +1,14 @@
-import { useRef, useCallback } from 'react';
+import { useRef, useCallback, useEffect, useState } from 'react';
+
+// Sprite generado por conversion/notes_sprite.py
+const SPRITE_INDEX_URL = `${process.env.PUBLIC_URL}/notes/sprite.json`;
+
+// fetch que falla con un 404/500 en vez de devolver la página de error
+const fetchOk = async (url) => {
+  const res = await fetch(url);
+  if (!res.ok) throw new Error(`${url}: HTTP ${res.status}`);
+  return res;
+};
 
 //--------------------------------------------------------------
 // Hooks de audio
@@ -18,8 +28,42 @@ export const useNoteToFreq = (NOTES) => {
 };
 
 // Hook para reproducir notas de audio
+// Usa el sprite (un solo fetch + decode) con Web Audio; si no está disponible
+// cae a los <audio> individuales de public/notes.
 export const usePlayNote = () => {
   const audioRefs = useRef({});
+  const spriteRef = useRef(null); // { ctx, buffer, notes }
+  const [spriteReady, setSpriteReady] = useState(false);
+
+  useEffect(() => {
+    let cancelled = false;
+    const AudioCtx = window.AudioContext || window.webkitAudioContext;
+    if (!AudioCtx) return;
+
+    (async () => {
+      let ctx = null;
+      try {
+        const index = await (await fetchOk(SPRITE_INDEX_URL)).json();
+        const data = await (await fetchOk(`${process.env.PUBLIC_URL}/notes/${index.file}`)).arrayBuffer();
+        ctx = new AudioCtx();
+        const buffer = await ctx.decodeAudioData(data);
+        if (cancelled) { ctx.close(); return; }
+        spriteRef.current = { ctx, buffer, notes: index.notes };
+        setSpriteReady(true);
+      } catch (e) {
+        // Si falló el decode, el contexto ya creado no se va a usar
+        if (ctx) ctx.close();
+        console.warn("Sprite de notas no disponible, usando audios individuales:", e);
+      }
+    })();
+
+    return () => {
+      cancelled = true;
+      if (spriteRef.current) spriteRef.current.ctx.close();
+      spriteRef.current = null;
+      setSpriteReady(false);
+    };
+  }, []);
 
   const playNote = useCallback((note) => {
     // Arreglo legacy para audios específicos 'la', 'zla', 'si'
@@ -29,6 +73,19 @@ export const usePlayNote = () => {
       const [, base, octave] = match;
       correctedNote = `${base}${parseInt(octave) + 1}`;
     }
+
+    const sprite = spriteRef.current;
+    const entry = sprite && sprite.notes[correctedNote];
+    if (entry) {
+      // El contexto puede nacer suspendido hasta la primera interacción
+      if (sprite.ctx.state === 'suspended') sprite.ctx.resume();
+      const source = sprite.ctx.createBufferSource();
+      source.buffer = sprite.buffer;
+      source.connect(sprite.ctx.destination);
+      source.start(0, entry.start, entry.length);
+      return;
+    }
+
     const audio = audioRefs.current[correctedNote];
     if (audio && audio instanceof HTMLAudioElement) {
       audio.currentTime = 0;
@@ -36,5 +93,5 @@ export const usePlayNote = () => {
     }
   }, []);
 
-  return { playNote, audioRefs };
+  return { playNote, audioRefs, spriteReady };
 };
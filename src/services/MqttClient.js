@@ -14,8 +14,14 @@ let client = null;
  * Conecta al broker MQTT (WebSockets) y registra un callback para mensajes entrantes.
  * @param {Function} onMessage - callback que recibe los datos del topic 'picow/fingers'
  *                               (objeto con {thumb:boolean, index:boolean, ...})
+ * @param {Function} [onReplay] - callback opcional para los flancos reenviados tras un
+ *                               corte ("replay": true). NO pasan por onMessage: llegan en
+ *                               ráfaga y tarde, y puntuarlos o sonarlos como toques en vivo
+ *                               ensuciaría la interpretación. Su "t" (ticks_ms de la Pico)
+ *                               permite ordenarlos/medir su antigüedad si se quieren registrar.
+ *                               Tras la ráfaga la Pico publica el estado actual en vivo.
  */
-export function connectMQTT(onMessage) {
+export function connectMQTT(onMessage, onReplay) {
   // Si ya existe un cliente y está conectado, lo reutilizamos.
   if (client?.connected) return client;
 
@@ -52,8 +58,15 @@ export function connectMQTT(onMessage) {
     try {
       // La Pico publica JSON con booleanos por dedo, lo parseamos.
       // Ej: {"thumb":true,"index":false,"middle":true,"ring":false,"pinky":false}
+      // "t" es el ticks_ms de la Pico; "replay":true marca flancos guardados durante una desconexión.
       const data = JSON.parse(payload.toString());
 
+      // Los flancos guardados durante un corte no son toques en vivo.
+      if (data.replay) {
+        onReplay && onReplay(data);
+        return;
+      }
+
       // Disparamos el callback recibido desde Piano.js (si existe).
       onMessage && onMessage(data);
     } catch (e) {
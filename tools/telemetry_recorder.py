@@ -0,0 +1,182 @@
+# Requiere: pip install numpy
+# Uso: python telemetry_recorder.py [salida.dat] [--port 5005]
+#
+# Qué hace:
+# - Escucha por UDP los lotes que envía MicroPython/telemetria.py
+# - Escribe cada frame directo en un np.memmap que crece por bloques
+# - Cuenta frames perdidos/desordenados a partir del número de secuencia
+# - Al terminar (Ctrl+C) recorta el archivo y guarda un .json con dtype y totales
+#
+# Leer después:  np.memmap('telemetry.dat', dtype=FRAME_DTYPE, mode='r')
+
+import argparse
+import json
+import os
+import socket
+import time
+
+import numpy as np
+
+MAGIC = b"HG"
+VERSION = 1
+HEADER_SIZE = 4                 # "HG" | versión u8 | n_frames u8
+CHANNELS = ["pinky", "ring", "middle", "index", "thumb"]
+TICKS_US_PERIOD = 1 << 30       # ticks_us de MicroPython da la vuelta en 2**30
+
+# Mismo layout que FRAME_FMT "<IIHHHHH" del firmware (18 bytes, sin padding)
+FRAME_DTYPE = np.dtype([
+    ("seq", "<u4"),
+    ("t_us", "<u4"),
+    ("ch", "<u2", (len(CHANNELS),)),
+])
+
+GROW_FRAMES = 1 << 16           # ~1.2 MB por bloque
+REPORT_EVERY_S = 2.0
+
+
+class MemmapWriter:
+    """Agrega registros a un archivo binario vía np.memmap, creciendo por bloques."""
+
+    def __init__(self, path, dtype, grow=GROW_FRAMES):
+        self.path = path
+        self.dtype = dtype
+        self.grow = grow
+        self.count = 0
+        self.capacity = 0
+        self.mm = None
+        open(path, "wb").close()
+        self._resize(grow)
+
+    def _resize(self, capacity):
+        if self.mm is not None:
+            self.mm.flush()
+            del self.mm
+        with open(self.path, "r+b") as f:
+            f.truncate(capacity * self.dtype.itemsize)
+        self.mm = np.memmap(self.path, dtype=self.dtype, mode="r+", shape=(capacity,))
+        self.capacity = capacity
+
+    def append(self, records):
+        n = len(records)
+        if self.count + n > self.capacity:
+            self._resize(max(self.capacity + self.grow, self.count + n))
+        self.mm[self.count:self.count + n] = records
+        self.count += n
+
+    def close(self):
+        """Recorta al número real de registros."""
+        self.mm.flush()
+        del self.mm
+        self.mm = None
+        with open(self.path, "r+b") as f:
+            f.truncate(self.count * self.dtype.itemsize)
+
+
+class SeqTracker:
+    """Detecta frames perdidos, duplicados o desordenados por número de secuencia.
+
+    Lleva el seq más alto visto (desenrollado, sin vuelta en 2**32): solo los
+    saltos por encima de él cuentan como perdidos. Lo que llega por debajo es
+    desordenado y, si tapa un hueco, se descuenta de los perdidos.
+    """
+
+    def __init__(self):
+        self.highest = None     # seq más alto visto, desenrollado
+        self.received = 0
+        self.lost = 0
+        self.out_of_order = 0
+
+    def update(self, seqs):
+        self.received += len(seqs)
+        if self.highest is None:
+            self.highest = int(seqs[0]) - 1
+        # Desenrollamos contra el más alto visto (diferencia módulo 2**32 con signo)
+        base = np.uint32(self.highest & 0xFFFFFFFF)
+        unwrapped = self.highest + (seqs - base).astype(np.int32).astype(np.int64)
+        running = np.maximum.accumulate(np.concatenate(([self.highest], unwrapped)))
+        steps = unwrapped - running[:-1]
+        self.lost += int((steps[steps > 0] - 1).sum())
+        self.out_of_order += int((steps <= 0).sum())
+        self.lost = max(self.lost - int((steps < 0).sum()), 0)
+        self.highest = int(running[-1])
+
+
+def parse_batch(data):
+    """Devuelve los frames de un datagrama como arreglo estructurado (o None)."""
+    if len(data) < HEADER_SIZE or data[:2] != MAGIC or data[2] != VERSION:
+        return None
+    n = data[3]
+    if len(data) < HEADER_SIZE + n * FRAME_DTYPE.itemsize:
+        return None
+    return np.frombuffer(data, dtype=FRAME_DTYPE, count=n, offset=HEADER_SIZE)
+
+
+def record(path, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+    sock.bind(("0.0.0.0", port))
+    sock.settimeout(0.5)
+
+    writer = MemmapWriter(path, FRAME_DTYPE)
+    seq = SeqTracker()
+    bad = 0
+    first_t = last_t = None
+    t_report = time.monotonic()
+    print(f"Escuchando UDP :{port} -> {path} (Ctrl+C para terminar)")
+
+    try:
+        while True:
+            try:
+                data, _ = sock.recvfrom(2048)
+            except socket.timeout:
+                data = None
+
+            if data:
+                frames = parse_batch(data)
+                if frames is None:
+                    bad += 1
+                elif len(frames):
+                    writer.append(frames)
+                    seq.update(frames["seq"])
+                    now = time.monotonic()
+                    first_t = first_t or now
+                    last_t = now
+
+            if time.monotonic() - t_report >= REPORT_EVERY_S and first_t:
+                rate = writer.count / max(last_t - first_t, 1e-6)
+                print(f"frames={writer.count}  ~{rate:.0f} Hz  perdidos={seq.lost}  "
+                      f"desordenados={seq.out_of_order}  inválidos={bad}")
+                t_report = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sock.close()
+        writer.close()
+
+    meta = {
+        "dtype": FRAME_DTYPE.descr,
+        "channels": CHANNELS,
+        "frames": writer.count,
+        "lost": seq.lost,
+        "out_of_order": seq.out_of_order,
+        "invalid_batches": bad,
+        "ticks_us_period": TICKS_US_PERIOD,
+    }
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    total = writer.count + seq.lost
+    pct = 100.0 * seq.lost / total if total else 0.0
+    print(f"✅ {writer.count} frames en {path}. Perdidos: {seq.lost} ({pct:.2f} %).")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Graba la telemetría cruda del guante.")
+    parser.add_argument("output", nargs="?", default="telemetry.dat")
+    parser.add_argument("--port", type=int, default=5005)
+    args = parser.parse_args()
+    record(args.output, args.port)
+
+
+if __name__ == "__main__":
+    main()